@@ -1,9 +1,26 @@
-from flask import Flask, render_template, request, session, redirect, url_for
+from flask import Flask, make_response, render_template, request, session, redirect, url_for
+from jinja2 import FileSystemBytecodeCache
+import hashlib
 import json
+import math
 import os
-from datetime import datetime
+import shutil
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
 from werkzeug.utils import secure_filename
 
+try:
+    import orjson
+except ImportError:  # optional speedup; stdlib json is used without it
+    orjson = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # optional; responses are sent uncompressed without it
+    Compress = None
+
 # ----------------- App + paths -----------------
 
 app = Flask(__name__)
@@ -15,109 +32,210 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 # Upload + log configuration
 UPLOAD_FOLDER = os.path.join(BASE_DIR, "static", "uploads")
-LOG_PATH = os.path.join(BASE_DIR, "data", "progress_log.json")
-ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg"}
+LOG_PATH = os.path.join(BASE_DIR, "data", "progress_log.jsonl")
+# Pre-JSON Lines log (one JSON array); imported once if LOG_PATH is missing
+LEGACY_LOG_PATH = os.path.join(BASE_DIR, "data", "progress_log.json")
+ALLOWED_EXTENSIONS = frozenset({"png", "jpg", "jpeg"})
 
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
-# Make sure upload folder exists
+# Behind a server that honours X-Sendfile (Apache mod_xsendfile, lighttpd),
+# export USE_X_SENDFILE=1 so it sends static files (photos) instead of
+# Python. nginx ignores X-Sendfile (blank files!): leave this off there and
+# serve /static/ directly with a `location /static/ { alias ...; }` block.
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE") == "1"
+
+# Compress text responses over ~500 bytes (gallery pages grow with uploads)
+app.config["COMPRESS_MIMETYPES"] = [
+    "text/html",
+    "text/css",
+    "application/json",
+    "application/javascript",
+]
+app.config["COMPRESS_LEVEL"] = 6
+if Compress is not None:
+    Compress(app)
+
+# Drop the blank lines/indent that block tags leave behind in the output
+app.jinja_env.trim_blocks = True
+app.jinja_env.lstrip_blocks = True
+
+# Keep compiled templates on disk so restarts / new workers skip re-parsing.
+# (Template auto-reload already follows debug mode.) JINJA_CACHE_DIR picks
+# the folder; default is .jinja_cache next to the app.
+JINJA_CACHE_DIR = os.environ.get("JINJA_CACHE_DIR") or os.path.join(BASE_DIR, ".jinja_cache")
+
+
+def jinja_settings_tag():
+    """
+    Short hash of the environment options that change compiled templates.
+    The bytecode cache only checks template source, so this goes in the
+    cache file names to keep bytecode from other settings out.
+    """
+    env = app.jinja_env
+    options = (
+        env.block_start_string,
+        env.block_end_string,
+        env.variable_start_string,
+        env.variable_end_string,
+        env.comment_start_string,
+        env.comment_end_string,
+        env.line_statement_prefix,
+        env.line_comment_prefix,
+        env.trim_blocks,
+        env.lstrip_blocks,
+        env.newline_sequence,
+        env.keep_trailing_newline,
+        env.optimized,
+        sorted(env.extensions),
+    )
+    return hashlib.sha1(repr(options).encode("utf-8")).hexdigest()[:8]
+
+
+def make_bytecode_cache():
+    """
+    Bytecode cache in JINJA_CACHE_DIR, else Jinja's private temp folder.
+    Returns None (no cache, templates still work) if neither is writable,
+    e.g. a read-only app directory.
+    """
+    pattern = f"__jinja2_{jinja_settings_tag()}_%s.cache"
+    try:
+        os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+        if os.access(JINJA_CACHE_DIR, os.W_OK):
+            return FileSystemBytecodeCache(JINJA_CACHE_DIR, pattern)
+    except OSError:
+        pass
+    try:
+        return FileSystemBytecodeCache(pattern=pattern)
+    except (OSError, RuntimeError):
+        return None
+
+
+app.jinja_env.bytecode_cache = make_bytecode_cache()
+
+# Make sure upload + log folders exist (once, at startup)
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
 
 # ----------------- Plant data -----------------
 
-with open(os.path.join(BASE_DIR, "plant_database.json"), "r", encoding="utf-8") as f:
-    PLANT_DB = json.load(f)
 
-# ----------------- Recommendation + impact -----------------
+def load_json_file(path):
+    """
+    Read a JSON file, parsing with orjson when it is installed.
+    """
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
 
-def get_recommendations(region, soil, wants_fruit):
+PLANT_DB = load_json_file(os.path.join(BASE_DIR, "plant_database.json"))
+
+# Form choices for /assess never change while the app is running
+REGIONS = tuple(sorted(PLANT_DB["regions"].keys()))
+SOILS = ("clayey", "sandy", "loamy")
+
+# How many recent users' rendered pages to keep in memory (per worker)
+PAGE_CACHE_USERS = 256
+
+
+@lru_cache(maxsize=PAGE_CACHE_USERS)
+def render_assess_form(username):
     """
-    Pick tree list + cost + maturity for a region/soil.
+    Blank /assess form for the logged-in user (the header shows their name).
+    Call render_assess_form.cache_clear() if PLANT_DB is ever reloaded.
     """
-    try:
-        data = PLANT_DB["regions"][region][soil]
-    except KeyError:
-        # Fallback if combo not in JSON
-        return {
-            "plants": [],
-            "cost_per_tree": 500,
-            "maturity_months": 24,
-        }
+    return render_template("assess.html", regions=REGIONS, soils=SOILS)
 
-    plants = []
 
+# ----------------- Recommendation + impact -----------------
+
+# Immutable so a precomputed result can be shared safely between requests
+Recommendation = namedtuple("Recommendation", "plants cost_per_tree maturity_months")
+
+# Returned when a region/soil combo is not in the JSON
+FALLBACK_REC = Recommendation(plants=(), cost_per_tree=500, maturity_months=24)
+
+
+def build_recommendation(data, wants_fruit):
+    """
+    Pick tree list + cost + maturity from one region/soil entry.
+    """
     # Add fruit trees first if user wants them
-    if wants_fruit and "fruit_trees" in data:
-        plants.extend(data["fruit_trees"])
+    plants = list(data["fruit_trees"]) if wants_fruit and "fruit_trees" in data else []
 
     # Add oxygen trees, avoid duplicates
-    if "oxygen_trees" in data:
-        for p in data["oxygen_trees"]:
-            if p not in plants:
-                plants.append(p)
+    seen = set(plants)
+    for p in data.get("oxygen_trees", ()):
+        if p not in seen:
+            seen.add(p)
+            plants.append(p)
 
     # If still empty, use native trees
-    if not plants and "native_trees" in data:
-        plants = data["native_trees"]
+    if not plants:
+        plants = list(data.get("native_trees", ()))
 
-    return {
-        "plants": plants,
-        "cost_per_tree": data.get("cost_per_tree", 500),
-        "maturity_months": data.get("maturity_months", 24),
-    }
+    return Recommendation(
+        plants=tuple(plants),
+        cost_per_tree=data.get("cost_per_tree", 500),
+        maturity_months=data.get("maturity_months", 24),
+    )
 
 
-def estimate_tree_count(area_sqm):
+# Every (region, soil, wants_fruit) answer, built once at startup
+RECOMMENDATIONS = {
+    (region, soil, wants_fruit): build_recommendation(data, wants_fruit)
+    for region, soils in PLANT_DB["regions"].items()
+    for soil, data in soils.items()
+    for wants_fruit in (False, True)
+}
+
+
+def get_recommendations(region, soil, wants_fruit):
     """
-    Estimate trees based on area (≈4 trees per m²).
+    Look up the precomputed recommendation for a region/soil.
     """
-    try:
-        area = float(area_sqm)
-    except (TypeError, ValueError):
-        return 0
-    if area <= 0:
-        return 0
-    return int(area * 4)
+    return RECOMMENDATIONS.get((region, soil, wants_fruit), FALLBACK_REC)
 
 
-def estimate_traditional_tree_count(area_sqm):
+def parse_area(area_sqm):
     """
-    Estimate trees in a traditional plantation (≈1.5 trees per m²).
+    Turn the submitted area into a non-negative float (0 if invalid).
     """
     try:
         area = float(area_sqm)
     except (TypeError, ValueError):
-        return 0
-    if area <= 0:
-        return 0
-    return int(area * 1.5)
+        return 0.0
+    # Rejects nan/inf too ("1e400" parses as inf), which int() can't take
+    if not (math.isfinite(area) and area > 0):
+        return 0.0
+    return area
+
+
+# Plantation model (rough demo numbers)
+MIYAWAKI_TREES_PER_SQM = 4
+TRADITIONAL_TREES_PER_SQM = 1.5
+TRADITIONAL_COST_FACTOR = 0.85     # ~15% cheaper per tree
+TRADITIONAL_MATURITY_FACTOR = 2    # ~2× longer to become stable
 
+# Very approximate impact constants (for demo)
+CO2_PER_TREE = 20      # kg CO₂ / tree / year
+OXYGEN_PER_TREE = 22   # kg O₂ / tree / year
 
-def compute_impact(tree_count, cost_per_tree):
+def estimate_tree_count(area):
     """
-    Rough CO₂, oxygen and cost impact.
+    Estimate trees based on a parsed area (≈4 trees per m²).
     """
-    if tree_count <= 0:
-        return {
-            "co2_kg_per_year": 0,
-            "oxygen_kg_per_year": 0,
-            "total_cost": 0,
-        }
-
-    # Very approximate constants (for demo)
-    co2_per_tree = 20      # kg CO₂ / tree / year
-    oxygen_per_tree = 22   # kg O₂ / tree / year
+    return int(area * MIYAWAKI_TREES_PER_SQM)
 
-    co2_total = tree_count * co2_per_tree
-    oxygen_total = tree_count * oxygen_per_tree
-    total_cost = tree_count * cost_per_tree
 
-    return {
-        "co2_kg_per_year": co2_total,
-        "oxygen_kg_per_year": oxygen_total,
-        "total_cost": total_cost,
-    }
+def estimate_traditional_tree_count(area):
+    """
+    Estimate trees in a traditional plantation (≈1.5 trees per m²).
+    """
+    return int(area * TRADITIONAL_TREES_PER_SQM)
 
 # ----------------- Day 3 helpers: uploads + log -----------------
 
@@ -126,77 +244,189 @@ def allowed_file(filename):
     """
     Check if file has an allowed extension.
     """
-    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+    dot = filename.rfind(".")
+    return dot != -1 and filename[dot + 1:].lower() in ALLOWED_EXTENSIONS
+
+
+# In-memory copy of the progress log, indexed username -> entries.
+# Refreshes read only the bytes appended since last time, so entries
+# written by other worker processes still show up.
+PROGRESS_LOG_LOCK = threading.Lock()
+PROGRESS_LOG_CACHE = {"stamp": None, "offset": 0, "by_user": {}}
+
+
+def refresh_progress_log():
+    """
+    Pull newly appended JSON Lines entries into PROGRESS_LOG_CACHE.
+    """
+    try:
+        st = os.stat(LOG_PATH)
+    except FileNotFoundError:
+        st = None
+    stamp = (st.st_ino, st.st_mtime_ns, st.st_size) if st else None
+
+    with PROGRESS_LOG_LOCK:
+        cache = PROGRESS_LOG_CACHE
+        if stamp == cache["stamp"]:
+            return cache
+
+        # Log removed, replaced or truncated: start from scratch
+        old = cache["stamp"]
+        if st is None or old is None or old[0] != st.st_ino or st.st_size < cache["offset"]:
+            cache.update(offset=0, by_user={})
+        cache["stamp"] = stamp
+        if st is None:
+            return cache
+
+        with open(LOG_PATH, "rb") as f:
+            f.seek(cache["offset"])
+            raw = f.read()
+        # Stop at the last newline in case another worker is mid-append
+        end = raw.rfind(b"\n") + 1
+        cache["offset"] += end
+
+        loads = orjson.loads if orjson is not None else json.loads
+        for line in raw[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = loads(line)
+            except ValueError:
+                # Skip a damaged line instead of losing the whole log
+                continue
+            cache["by_user"].setdefault(entry.get("username"), []).append(entry)
+        return cache
+
+
+def load_user_progress_entries(username):
+    """
+    Progress entries saved by one user, oldest first.
+    """
+    return refresh_progress_log()["by_user"].get(username, [])
 
 
-def load_progress_log():
+def encode_progress_line(entry):
     """
-    Read the JSON progress log from disk.
+    One progress-log line (UTF-8 JSON + newline) for an entry.
     """
-    if not os.path.exists(LOG_PATH):
-        return []
-    with open(LOG_PATH, "r", encoding="utf-8") as f:
-        try:
-            return json.load(f)
-        except json.JSONDecodeError:
-            return []
+    if orjson is not None:
+        return orjson.dumps(entry) + b"\n"
+    return (json.dumps(entry, ensure_ascii=False) + "\n").encode("utf-8")
 
 
-def save_progress_log(entries):
+def migrate_legacy_progress_log():
     """
-    Write the JSON progress log to disk.
+    Convert the old JSON-array progress_log.json into LOG_PATH, once.
+    Runs only while LOG_PATH is missing or empty; the old file is kept.
     """
-    with open(LOG_PATH, "w", encoding="utf-8") as f:
-        json.dump(entries, f, ensure_ascii=False, indent=2)
+    if not os.path.exists(LEGACY_LOG_PATH):
+        return
+    if os.path.exists(LOG_PATH) and os.path.getsize(LOG_PATH) > 0:
+        return
+    try:
+        entries = load_json_file(LEGACY_LOG_PATH)
+    except ValueError:
+        return
+    if not isinstance(entries, list) or not entries:
+        return
+
+    # Write aside, then link into place so two workers starting together
+    # can't both migrate or clobber an entry appended in the meantime
+    tmp_path = f"{LOG_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(encode_progress_line(e) for e in entries if isinstance(e, dict)))
+    try:
+        os.link(tmp_path, LOG_PATH)
+    except FileExistsError:
+        # An empty log left by an earlier version can simply be replaced
+        if os.path.getsize(LOG_PATH) == 0:
+            os.replace(tmp_path, LOG_PATH)
+    except OSError:
+        # No hard links on this filesystem (some SMB/FAT/bind mounts):
+        # fall back to a plain rename while the log is still missing or empty
+        if not os.path.exists(LOG_PATH) or os.path.getsize(LOG_PATH) == 0:
+            os.replace(tmp_path, LOG_PATH)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def append_progress_entry(entry):
+    """
+    Append one entry to the progress log without rewriting the file.
+    """
+    line = encode_progress_line(entry)
+    # One unbuffered O_APPEND write: lines from concurrent workers can't
+    # interleave, and the kernel always appends at the current end of file
+    fd = os.open(LOG_PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+    finally:
+        os.close(fd)
 
 
 def save_progress_entry(region, soil, area_sqm, note, file_storage):
     if not (file_storage and allowed_file(file_storage.filename)):
         return None
 
-    timestamp = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    # One clock read: nanosecond prefix keeps same-second uploads apart
+    now_ns = time.time_ns()
     original = secure_filename(file_storage.filename)
-    filename = f"{timestamp}_{original}"
+    filename = f"{now_ns}_{original}"
     filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-    file_storage.save(filepath)
+    # Copy in 1 MB chunks (Werkzeug's save() uses 16 KB) to cut syscalls
+    with open(filepath, "wb") as out:
+        shutil.copyfileobj(file_storage.stream, out, length=1024 * 1024)
 
-    created_at = datetime.utcnow().strftime("%d %b %Y, %I:%M %p")
+    created_at = time.strftime("%d %b %Y, %I:%M %p", time.gmtime(now_ns // 1_000_000_000))
 
     coach_tips = [
         "For a larger patch like this, do a quick monthly walk-through to fill gaps and keep high density.",
     ]
 
-    entries = load_progress_log()
-    entries.append(
+    append_progress_entry(
         {
             "region": region,
             "soil": soil,
             "area_sqm": area_sqm,
             "note": note,
             "filename": filename,
+            # Stored so the gallery doesn't need url_for per photo
+            "url": url_for("static", filename=f"uploads/{filename}"),
             "created_at": created_at,
             "username": session.get("username"),
             "coach_tips": coach_tips,
         }
     )
-    save_progress_log(entries)
     return filename
 
 
-def load_progress_entries():
-    """Read all saved progress entries from the JSON log."""
-    if not os.path.exists(LOG_PATH):
-        return []
+# Import any pre-JSON Lines log, then build the in-memory index at startup
+migrate_legacy_progress_log()
+refresh_progress_log()
+
+
+def compute_app_version():
+    """
+    Short hash of the code, templates and CSS that shape a page, so ETags
+    change with every deploy (same value in every worker).
+    """
+    digest = hashlib.sha1()
+    sources = [os.path.abspath(__file__)]
+    for folder in ("templates", os.path.join("static", "css")):
+        root = os.path.join(BASE_DIR, folder)
+        for dirpath, _, filenames in os.walk(root):
+            sources.extend(os.path.join(dirpath, name) for name in filenames)
+    for path in sorted(sources):
+        digest.update(os.path.relpath(path, BASE_DIR).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+APP_VERSION = compute_app_version()
+
 
-    try:
-        with open(LOG_PATH, "r", encoding="utf-8") as f:
-            entries = json.load(f)
-            # Ensure it's a list
-            if isinstance(entries, list):
-                return entries
-            return []
-    except (json.JSONDecodeError, FileNotFoundError):
-        return []
 def compute_badges_for_user(user_entries):
     """
     Return a small list of badge labels based on number of entries
@@ -215,6 +445,38 @@ def compute_badges_for_user(user_entries):
     return badges
 
 
+@lru_cache(maxsize=PAGE_CACHE_USERS)
+def render_gallery(username, count):
+    """
+    /gallery page for the logged-in user's first `count` entries. The log is
+    append-only, so (username, count) pins down the page.
+    """
+    user_entries = load_user_progress_entries(username)[:count]
+
+    # Newest first: the log is append-only, so just walk it backwards
+    entries_sorted = list(reversed(user_entries))
+
+    # Compute simple badges for this user
+    badges = compute_badges_for_user(user_entries)
+
+    return render_template(
+        "gallery.html",
+        entries=entries_sorted,
+        badges=badges,
+    )
+
+
+def client_has_etag(etag):
+    """
+    True if the request's If-None-Match already holds this ETag
+    (Flask-Compress sends it back as e.g. "<etag>:gzip").
+    """
+    if_none_match = request.if_none_match
+    if if_none_match.star_tag:
+        return True
+    return any(tag.partition(":")[0] == etag for tag in if_none_match.as_set(include_weak=True))
+
+
 # ----------------- Routes -----------------
 
 @app.route("/login", methods=["GET", "POST"])
@@ -265,30 +527,40 @@ def assess():
     Show form (GET) or results (POST).
     """
     if request.method == "POST":
-        # Read form inputs
-        region = request.form.get("region")
-        soil = request.form.get("soil")
-        wants_fruit = request.form.get("wants_fruit") == "on"
-        area_sqm = request.form.get("area_sqm")
+        # Read form inputs (local alias skips the request proxy each time)
+        form = request.form
+        region = form.get("region")
+        soil = form.get("soil")
+        wants_fruit = form.get("wants_fruit") == "on"
+        area_sqm = form.get("area_sqm")
 
-        # NEW: check if an image was uploaded
-        image_file = request.files.get("plot_image")
-        has_image = bool(image_file and image_file.filename)
+        # Set by the form when a photo is picked; the file itself isn't uploaded
+        has_image = form.get("has_image") == "1"
 
         # Miyawaki recommendations and impact
         rec = get_recommendations(region, soil, wants_fruit)
-        tree_count = estimate_tree_count(area_sqm)
-        impact = compute_impact(tree_count, rec["cost_per_tree"])
+        area = parse_area(area_sqm)
+        tree_count = estimate_tree_count(area)
+        impact = {
+            "co2_kg_per_year": tree_count * CO2_PER_TREE,
+            "oxygen_kg_per_year": tree_count * OXYGEN_PER_TREE,
+            "total_cost": tree_count * rec.cost_per_tree,
+        }
 
         # Traditional plantation scenario (lower density, slightly cheaper per tree)
-        traditional_tree_count = estimate_traditional_tree_count(area_sqm)
-        traditional_cost_per_tree = int(rec["cost_per_tree"] * 0.85)  # ~15% cheaper
-        traditional_impact = compute_impact(traditional_tree_count, traditional_cost_per_tree)
+        traditional_tree_count = estimate_traditional_tree_count(area)
+        traditional_cost_per_tree = int(rec.cost_per_tree * TRADITIONAL_COST_FACTOR)
+        traditional_impact = {
+            "co2_kg_per_year": traditional_tree_count * CO2_PER_TREE,
+            "oxygen_kg_per_year": traditional_tree_count * OXYGEN_PER_TREE,
+            "total_cost": traditional_tree_count * traditional_cost_per_tree,
+        }
 
-        # Assume traditional plantations take about 2× longer to become stable
-        traditional_maturity_months = int(rec["maturity_months"] * 2)
+        # Assume traditional plantations take longer to become stable
+        traditional_maturity_months = int(rec.maturity_months * TRADITIONAL_MATURITY_FACTOR)
 
-        # Simple ratios for explanation (avoid divide-by-zero)
+        # Simple ratios for explanation, from the numbers shown on the page
+        # (avoid divide-by-zero)
         trees_ratio = 0
         cost_ratio = 0
         speed_ratio = 0
@@ -297,7 +569,7 @@ def assess():
         if traditional_impact["total_cost"] > 0:
             cost_ratio = round(impact["total_cost"] / traditional_impact["total_cost"], 1)
         if traditional_maturity_months > 0:
-            speed_ratio = round(traditional_maturity_months / rec["maturity_months"], 1)
+            speed_ratio = round(traditional_maturity_months / rec.maturity_months, 1)
 
         comparison = {
             "trees_ratio": trees_ratio,
@@ -322,10 +594,8 @@ def assess():
             has_image=has_image,  # NEW: pass flag to template
         )
 
-    # For GET: show blank form
-    regions = sorted(PLANT_DB["regions"].keys())
-    soils = ["clayey", "sandy", "loamy"]
-    return render_template("assess.html", regions=regions, soils=soils)
+    # For GET: show blank form (rendered once per recent user)
+    return render_assess_form(session["username"])
 
 
 @app.route("/progress", methods=["GET", "POST"])
@@ -339,10 +609,11 @@ def progress():
     """
     if request.method == "POST":
         # Hidden context fields
-        region = request.form.get("region")
-        soil = request.form.get("soil")
-        area_sqm = request.form.get("area_sqm")
-        note = request.form.get("note", "").strip()
+        form = request.form
+        region = form.get("region")
+        soil = form.get("soil")
+        area_sqm = form.get("area_sqm")
+        note = form.get("note", "").strip()
 
         file = request.files.get("photo")
         saved_filename = save_progress_entry(region, soil, area_sqm, note, file)
@@ -376,33 +647,32 @@ def gallery():
     if guard:
         return guard
 
-    entries = load_progress_entries()
     current_user = session.get("username")
 
-    # Filter entries for this user only
-    user_entries = [
-        e for e in entries
-        if e.get("username") == current_user
-    ]
-
-    # Newest first
-    entries_sorted = sorted(
-        user_entries,
-        key=lambda e: e.get("created_at", ""),
-        reverse=True,
-    )
-
-    # Compute simple badges for this user
-    badges = compute_badges_for_user(user_entries)
-
-    return render_template(
-        "gallery.html",
-        entries=entries_sorted,
-        badges=badges,
-    )
+    # Entries for this user only (from the in-memory index)
+    user_entries = load_user_progress_entries(current_user)
 
+    # The log is append-only, so the page only changes when the count does.
+    # That makes (app version, user, count) a cheap ETag for conditional GETs.
+    count = len(user_entries)
+    etag = hashlib.sha1(f"{APP_VERSION}:{current_user}:{count}".encode("utf-8")).hexdigest()
+    if client_has_etag(etag):
+        response = make_response("", 304)
+    else:
+        if count:
+            html = render_gallery(current_user, count)
+        else:
+            # Nothing worth caching for an empty gallery
+            html = render_template("gallery.html", entries=[], badges=[])
+        response = make_response(html)
+
+    # Browser may keep the page but must check back before reusing it
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
 
 
 if __name__ == "__main__":
-    # Run dev server with auto-reload and debug
-    app.run(debug=True)
+    # Dev server; debug + auto-reload only when FLASK_DEBUG=1
+    debug = os.environ.get("FLASK_DEBUG") == "1"
+    app.run(debug=debug, use_reloader=debug)
@@ -0,0 +1,12 @@
+# Gunicorn settings for serving Miyavkify: gunicorn -c gunicorn.conf.py
+import multiprocessing
+import os
+
+wsgi_app = "wsgi:app"
+bind = os.environ.get("BIND", "0.0.0.0:8000")
+
+# Several processes to use every core, plus threads in each so requests
+# waiting on disk (uploads, progress log) don't block the others.
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = 8
@@ -0,0 +1,6 @@
+"""
+WSGI entry point for production servers, e.g.:
+
+    gunicorn -c gunicorn.conf.py
+"""
+from app import app  # noqa: F401